@@ -1,16 +1,19 @@
 import os
-from openai import OpenAI
+from functools import lru_cache
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 load_dotenv()
 
 
-@dataclass
+@dataclass(slots=True)
 class XAIClient:
     api_key: str = os.getenv("XAI_API_KEY")
     base_url: str = "https://api.x.ai/v1"
+    client: OpenAI = field(init=False, repr=False)
+    async_client: AsyncOpenAI = field(init=False, repr=False)
 
     def __post_init__(self):
         self.client = OpenAI(
@@ -18,6 +21,11 @@ class XAIClient:
             base_url=self.base_url,
             timeout=3600,
         )
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=3600,
+        )
     
     def get_response(self, model: str, messages: list = None):
         """
@@ -36,6 +44,25 @@ class XAIClient:
 
         except Exception as e:
             print(f"Error: {e}")
+
+    async def get_response_async(self, model: str, messages: list = None):
+        """
+        Get a response from the Grok AI model without blocking the event loop,
+        so many summaries can be in flight at once.
+
+        :param model: The Grok model to use (e.g., 'grok-3').
+        :param messages: The input messages for the AI model.
+        :return: The response content from the AI model.
+        """
+        try:
+            completion = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+            return completion.choices[0].message.content
+
+        except Exception as e:
+            print(f"Error: {e}")
     
     def get_structured_response(self, model: str, response_format: BaseModel = None, content: str = None):
         """
@@ -65,4 +92,12 @@ class XAIClient:
             return completion.choices[0].message.parsed
         
         except Exception as e:
-            print(f"Error: {e}")
\ No newline at end of file
+            print(f"Error: {e}")
+
+
+@lru_cache(maxsize=1)
+def get_xai_client() -> XAIClient:
+    """
+    Return the shared XAIClient so every caller reuses one OpenAI connection pool.
+    """
+    return XAIClient()
@@ -1,21 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from models import FederalReserve_RSS
-import feedparser
 
 
 frb = FederalReserve_RSS()
 
+def fetch_speech(url: str):
+    # a page that fails to fetch or parse is logged and dropped, not fatal to the run
+    try:
+        return frb.fetch_fed_speech(url=url)
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+async def summarize_and_store(speeches: list[dict]):
+    # cap in-flight Grok requests (including per-window calls) to respect rate limits
+    semaphore = asyncio.Semaphore(8)
+
+    async def process(speech: dict):
+        try:
+            summary = await frb.summarize_speech(speech, semaphore=semaphore)
+            frb.append_speech_to_json(speech=speech, summary=summary)
+        except Exception as e:
+            print(f"Error storing {speech.get('url')}: {e}")
+
+    await asyncio.gather(*(process(speech) for speech in speeches))
+
 def main():
-    # get list of urls from rss feed
-    feed_url = frb.get_url_by_name("All Speeches and Testimony")
+    # skip speeches already stored before paying for the fetch and parse
+    seen_urls = frb.seen_urls()
 
-    # parse url to get feed
-    feeds = feedparser.parse(feed_url)
-    # print(feeds["entries"][0])
+    # stream new links from the rss feed straight into parallel fetches of each fed speech
+    links = (link for link in frb.iter_feed_links("All Speeches and Testimony") if link not in seen_urls)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        new_speeches = [speech for speech in executor.map(fetch_speech, links) if speech]
 
-    # loop - fetch fed speech
-    for entry in feeds["entries"]:
-        speech_data = frb.fetch_fed_speech(url=entry.link)
-        frb.append_speech_to_json(speech=speech_data)
+    # summarize new speeches concurrently, writing each as soon as its summary arrives
+    asyncio.run(summarize_and_store(new_speeches))
 
 
 if __name__ == "__main__":
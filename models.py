@@ -1,16 +1,212 @@
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List
 from urllib.parse import urlencode
+from xml.etree import ElementTree
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.utils import _parse_content_type_header
+from urllib3.util.retry import Retry
+from lxml import etree
 from datetime import datetime
 import os
 from pathlib import Path
 import json
-from clients import XAIClient
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from contextlib import nullcontext
+from clients import get_xai_client
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
 
-@dataclass
+
+# Serializes writes to a speaker's JSON file when speeches are fetched in parallel
+_SPEAKER_LOCKS = defaultdict(threading.Lock)
+
+# Per-speaker index of stored URLs and content fingerprints -> summaries, loaded
+# once per run and kept in step with each append (guarded by _SPEAKER_LOCKS)
+_SPEAKER_CACHE: dict[Path, dict] = {}
+
+
+# (tag name, class) -> speech field; h3 matches regardless of class, other tags
+# match on their whole class attribute or on any one of their classes
+_SPEECH_TAGS = {
+    ("h3", None): "title",
+    ("p", "speaker"): "speaker",
+    ("p", "article__time"): "date",
+    ("p", "location"): "location",
+    ("div", "col-xs-12 col-sm-8 col-md-8"): "content",
+}
+
+
+# Speeches longer than this many characters are summarized in overlapping windows
+_SUMMARY_CHUNK_THRESHOLD = 24_000
+_SUMMARY_CHUNK_SIZE = 8_000
+_SUMMARY_CHUNK_OVERLAP = 500
+
+
+def _summary_messages(prompt: str, content: str) -> list[dict]:
+    """Build the chat messages asking Grok to summarize some content."""
+    return [
+        {
+            "role": "system",
+            "content": prompt
+        },
+        {
+            "role": "user",
+            "content": content
+        }
+    ]
+
+
+def _build_session() -> requests.Session:
+    """
+    Build the shared HTTP session: pooled keep-alive connections sized for the
+    fetch pool, with retry and backoff on throttling and transient server errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Unread body left after an early parse exit that is still worth reading, so the
+# connection goes back to the pool instead of forcing a new TCP+TLS handshake
+_DRAIN_LIMIT = 256 * 1024
+
+
+def _drain_response(response: requests.Response, chunks: Iterable[bytes]) -> None:
+    """
+    Read out a small unread remainder of a streamed response; larger remainders
+    are abandoned and the connection is dropped when the response closes.
+    """
+    length = response.headers.get("Content-Length")
+    if length is not None and int(length) - response.raw.tell() > _DRAIN_LIMIT:
+        return
+    drained = 0
+    for chunk in chunks:
+        drained += len(chunk)
+        if drained > _DRAIN_LIMIT:
+            return
+
+
+def _response_charset(response: requests.Response) -> str:
+    """
+    Return the charset declared in a response's Content-Type header, tolerating
+    quoted values and trailing parameters. federalreserve.gov serves UTF-8, so
+    that is used when no charset is declared rather than letting lxml fall back
+    to latin-1.
+    """
+    _, params = _parse_content_type_header(response.headers.get("Content-Type", ""))
+    return params.get("charset", "").strip().strip("\"'") or "utf-8"
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Directories already created this run, so makedirs isn't repeated per speech
+_DIRS_READY = set()
+
+
+def _ensure_dir(path) -> None:
+    """Create a directory (and parents) the first time it is needed."""
+    path = str(path)
+    if path not in _DIRS_READY:
+        os.makedirs(path, exist_ok=True)
+        _DIRS_READY.add(path)
+
+
+# Spaces become underscores; characters that are unsafe in file names are dropped
+_SLUG_TABLE = str.maketrans({" ": "_", **{c: None for c in '/\\:*?"<>|'}})
+
+
+@lru_cache(maxsize=256)
+def _speaker_paths(base_dir: str, speaker: str) -> tuple[str, Path, Path]:
+    """
+    Return the slug, JSONL path and URL sidecar path for a speaker.
+    """
+    speaker_slug = speaker.lower().translate(_SLUG_TABLE)
+    return speaker_slug, Path(base_dir) / f"{speaker_slug}.jsonl", Path(base_dir) / f"{speaker_slug}.urls"
+
+
+def _content_fingerprint(content: str) -> str:
+    """
+    Fingerprint speech content so re-posted copies with only whitespace or
+    casing differences hash the same.
+    """
+    normalized = " ".join(content.lower().split())
+    return hashlib.sha1(normalized[:4096].encode()).hexdigest()
+
+
+def _migrate_legacy_json(json_path: Path) -> None:
+    """
+    Convert a legacy <slug>.json speaker file ({"speaker": ..., "speeches": [...]})
+    into <slug>.jsonl and <slug>.urls, unless the JSONL file already exists.
+    The legacy file is left in place.
+    """
+    jsonl_path = json_path.with_suffix(".jsonl")
+    urls_path = json_path.with_suffix(".urls")
+    if jsonl_path.exists() or not json_path.exists():
+        return
+
+    data = _loads(json_path.read_bytes())
+    speeches = data.get("speeches", [])
+    lines = [_dumps({"speaker": data.get("speaker"), **entry}) + b"\n" for entry in speeches]
+    urls = [f"{entry.get('url')}\n" for entry in speeches]
+
+    # Write both files before swapping them in; the JSONL file marks the migration done
+    tmp_suffix = f".{threading.get_ident()}.tmp"
+    jsonl_tmp = jsonl_path.with_name(jsonl_path.name + tmp_suffix)
+    urls_tmp = urls_path.with_name(urls_path.name + tmp_suffix)
+    jsonl_tmp.write_bytes(b"".join(lines))
+    urls_tmp.write_text("".join(urls), encoding="utf-8")
+    os.replace(urls_tmp, urls_path)
+    os.replace(jsonl_tmp, jsonl_path)
+    print(f"✔️ Migrated {len(speeches)} speeches from {json_path} to {jsonl_path}")
+
+
+def _speaker_index(jsonl_path: Path, urls_path: Path) -> dict:
+    """
+    Return the cached index for a speaker's files, reading them from disk on
+    first use. Callers must hold the speaker's lock.
+    """
+    index = _SPEAKER_CACHE.get(jsonl_path)
+    if index is None:
+        _migrate_legacy_json(jsonl_path.with_suffix(".json"))
+        urls = set(urls_path.read_text(encoding="utf-8").splitlines()) if urls_path.exists() else set()
+        summaries = {}
+        if jsonl_path.exists():
+            with open(jsonl_path, "rb") as f:
+                for line in f:
+                    entry = _loads(line)
+                    if entry.get("content") and entry.get("summary"):
+                        summaries[_content_fingerprint(entry["content"])] = entry["summary"]
+        index = _SPEAKER_CACHE[jsonl_path] = {"urls": urls, "summaries": summaries}
+    return index
+
+
+@dataclass(slots=True, frozen=True)
 class Feed:
     """
     Base class for rss feeds.
@@ -24,16 +220,20 @@ class Feed:
     url: str = field(init=False)
 
     def __post_init__(self):
+        # Plain feeds need no query string
+        if self.site is None and self.content_type is None and self.max is None:
+            object.__setattr__(self, "url", self.base_url)
+            return
+
         params = {}
         if self.site is not None:
             params["Site"] = self.site
         if self.content_type is not None:
             params["ContentType"] = self.content_type
         if self.max is not None:
-            params["Max"] = str(self.max)
+            params["Max"] = self.max
 
-        query_string = urlencode(params)
-        self.url = f"{self.base_url}?{query_string}" if query_string else self.base_url
+        object.__setattr__(self, "url", f"{self.base_url}?{urlencode(params)}")
 
 
 @dataclass
@@ -43,11 +243,14 @@ class BaseRSS:
     """
     feeds: List[Feed]
 
+    def __post_init__(self):
+        self._by_name = {f.name: f for f in self.feeds}
+
     def get_url_by_name(self, name: str) -> Optional[str]:
-        feed = next((f for f in self.feeds if f.name == name), None)
-        if not feed:
-            raise ValueError(f"No feed found with name '{name}'")
-        return feed.url
+        try:
+            return self._by_name[name].url
+        except KeyError:
+            raise ValueError(f"No feed found with name '{name}'") from None
 
 
 @dataclass
@@ -67,37 +270,116 @@ class FederalReserve_RSS(BaseRSS):
             description="All press releases from the Federal Reserve Board."
         )
     ])
+    session: requests.Session = field(default_factory=_build_session, repr=False)
+    # (speaker slug, content fingerprint) -> in-flight summary task, so concurrent duplicates share one Grok call
+    _pending_summaries: dict[tuple[str, str], asyncio.Task] = field(default_factory=dict, init=False, repr=False)
+
+    def iter_feed_links(self, name: str) -> Iterator[str]:
+        """
+        Stream an RSS feed, yielding each item's link as soon as its <item> has been parsed.
+        """
+        with self.session.get(self.get_url_by_name(name), stream=True, timeout=30) as response:
+            response.raw.decode_content = True
+            for _, el in ElementTree.iterparse(response.raw, events=("end",)):
+                if el.tag == "item":
+                    link = el.findtext("link")
+                    if link:
+                        yield link.strip()
+                    el.clear()
 
-    def fetch_fed_speech(self, url: str) -> dict:
+    def fetch_fed_speech(self, url: str, cache_dir="fed_speeches_json/.http_cache") -> dict:
         """
         Fetch an individual speech from the FRB All Speeches and Testimony feed.
+        Uses a conditional GET against an on-disk cache, so unchanged pages
+        are neither re-downloaded nor re-parsed.
+        """
+        cache_path = Path(cache_dir) / f"{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}.json"
+        cached = _loads(cache_path.read_bytes()) if cache_path.exists() else None
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304 and cached:
+                _drain_response(response, response.iter_content(65536))
+                return cached["speech"]
+
+            chunks = response.iter_content(65536)
+            speech = self._parse_fed_speech(chunks, url, encoding=_response_charset(response))
+            _drain_response(response, chunks)
+
+        # Only pages with validators can be revalidated later
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.ok and (etag or last_modified):
+            _ensure_dir(cache_dir)
+            tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(_dumps({"etag": etag, "last_modified": last_modified, "speech": speech}))
+            os.replace(tmp_path, cache_path)
+
+        return speech
+
+    def _parse_fed_speech(self, chunks: Iterable[bytes], url: str, encoding: Optional[str] = None) -> dict:
+        """
+        Incrementally parse a speech page into its title, speaker, date, location
+        and content, stopping as soon as every field has been captured.
         """
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        try:
+            parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+        except LookupError:
+            # A declared charset lxml doesn't know; the site serves UTF-8
+            parser = etree.HTMLPullParser(events=("end",), encoding="utf-8")
 
-        # Extract title
-        title = soup.find('h3').get_text(strip=True)
+        # Collect every tag we need as the document streams in
+        tags = {}
 
-        # Extract speaker
-        speaker_tag = soup.find('p', class_='speaker')
-        speaker = speaker_tag.get_text(strip=True) if speaker_tag else None
+        def collect_events():
+            for _, el in parser.read_events():
+                if el.tag == 'h3':
+                    keys = [(el.tag, None)]
+                else:
+                    # Match the full class string, or any single class (like BeautifulSoup's class_)
+                    classes = el.get('class', '').split()
+                    keys = [(el.tag, " ".join(classes))] + [(el.tag, c) for c in classes]
+                for key in keys:
+                    field_name = _SPEECH_TAGS.get(key)
+                    if field_name and field_name not in tags:
+                        tags[field_name] = el
+                        break
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            collect_events()
+            if len(tags) == len(_SPEECH_TAGS):
+                break
+        else:
+            # End of document: flush elements the parser was still holding open
+            parser.close()
+            collect_events()
+
+        def text_of(el):
+            return "".join(text.strip() for text in el.itertext())
+
+        def field_text(field_name):
+            el = tags.get(field_name)
+            return text_of(el) if el is not None else None
+
+        # Extract title, speaker and location
+        title = field_text('title')
+        speaker = field_text('speaker')
+        location = field_text('location')
 
         # Extract date (convert to ISO format)
-        date_tag = soup.find('p', class_='article__time')
-        date_raw = date_tag.get_text(strip=True) if date_tag else None
+        date_raw = field_text('date')
         date = datetime.strptime(date_raw, "%B %d, %Y").isoformat() if date_raw else None
 
-        # Extract location (found in <em> inside the first paragraph)
-        location_tag = soup.find('p', class_='location')
-        location = location_tag.get_text(strip=True) if location_tag else None
-        content_div = soup.find('div', class_='col-xs-12 col-sm-8 col-md-8')
-        if content_div:
-            first_para = content_div.find('p')
-            em = first_para.find('em') if first_para else None
-
         # Extract full content for summarization
-        paragraphs = content_div.find_all('p') if content_div else []
-        content = "\n".join(p.get_text(strip=True) for p in paragraphs)
+        content_div = tags.get('content')
+        paragraphs = content_div.iter('p') if content_div is not None else []
+        content = "\n".join(text_of(p) for p in paragraphs)
 
         return {
             "title": title,
@@ -108,61 +390,138 @@ class FederalReserve_RSS(BaseRSS):
             "content": content
         }
 
-    def append_speech_to_json(self, speech: dict, base_dir="fed_speeches_json"):
+    def seen_urls(self, base_dir="fed_speeches_json") -> set[str]:
         """
-        Append a speech dict to a JSON file grouped by speaker.
-        Prevents duplication by comparing URLs.
+        Return every speech URL already stored, across all speakers, so known
+        speeches can be skipped before they are fetched.
         """
-        os.makedirs(base_dir, exist_ok=True)
+        for json_path in Path(base_dir).glob("*.json"):
+            speaker_slug = json_path.stem
+            with _SPEAKER_LOCKS[speaker_slug]:
+                _migrate_legacy_json(json_path)
 
-        speaker_slug = speech['speaker'].lower().replace(" ", "_")
-        json_path = Path(base_dir) / f"{speaker_slug}.json"
+        urls = set()
+        for urls_path in Path(base_dir).glob("*.urls"):
+            urls.update(urls_path.read_text(encoding="utf-8").splitlines())
+        return urls
 
-        # Load existing data or initialize structure
-        if json_path.exists():
-            with open(json_path, "r") as f:
-                data = json.load(f)
-        else:
-            data = {
+    def append_speech_to_json(self, speech: dict, summary: str, base_dir="fed_speeches_json"):
+        """
+        Append a summarized speech dict to a JSONL file grouped by speaker.
+        Prevents duplication by comparing URLs against a sidecar .urls file.
+        Speeches without a summary are not stored, so the next run retries them.
+        """
+        if not summary:
+            print(f"⚠️ No summary for {speech.get('url')}. Skipping so it is retried next run.")
+            return
+
+        _ensure_dir(base_dir)
+
+        speaker_slug, jsonl_path, urls_path = _speaker_paths(base_dir, speech["speaker"])
+
+        with _SPEAKER_LOCKS[speaker_slug]:
+            index = _speaker_index(jsonl_path, urls_path)
+
+            # Deduplication check based on URL
+            if speech.get("url") in index["urls"]:
+                print(f"⚠️ Speech already exists in {jsonl_path}. Skipping.")
+                return
+
+            cleaned_speech = {
                 "speaker": speech["speaker"],
-                "speeches": []
+                "title": speech["title"],
+                "date": speech["date"],
+                "location": speech["location"],
+                "url": speech.get("url"),
+                "summary": summary,
+                "content": speech["content"],
             }
 
-        # Deduplication check based on URL
-        existing_urls = {entry.get("url") for entry in data.get("speeches", [])}
-        if speech.get("url") in existing_urls:
-            print(f"⚠️ Speech already exists in {json_path}. Skipping.")
-            return
-        
-        # get ai summary of speech
-        xclient = XAIClient()
-
-        messages = [
-            {
-                "role": "system",
-                "content": f"Please summarize the following speech/testimony given by Federal Reserve Board {speech["speaker"]}"
-            },
-            {
-                "role": "user",
-                "content": speech["content"]
-            }
-        ]
+            # Append one line per speech instead of rewriting the whole file
+            with open(jsonl_path, "ab") as f:
+                f.write(_dumps(cleaned_speech) + b"\n")
+            with open(urls_path, "a", encoding="utf-8") as f:
+                f.write(f"{speech.get('url')}\n")
 
-        speech_summary = xclient.get_response(model="grok-3-mini", messages = messages)
+            index["urls"].add(speech.get("url"))
+            if speech["content"] and summary:
+                index["summaries"][_content_fingerprint(speech["content"])] = summary
 
-        cleaned_speech = {
-            "title": speech["title"],
-            "date": speech["date"],
-            "location": speech["location"],
-            "url": speech.get("url"),
-            "summary": speech_summary,
-            "content": speech["content"],
-        }
+            print(f"✔️ Appended new speech to {jsonl_path}")
+
+    async def summarize_speech(self, speech: dict, base_dir="fed_speeches_json", semaphore: Optional[asyncio.Semaphore] = None) -> str:
+        """
+        Summarize a speech with Grok. Reuses the summary of a near-identical
+        speech already stored for the speaker, and caches new summaries on disk
+        by content hash so re-runs never pay for the same speech twice.
+        Concurrent calls for near-identical content await a single summary.
+        When given, semaphore caps every Grok request made, including the
+        per-window requests for long speeches.
+        """
+        # Scoped per speaker like _speaker_index, since the prompt names the speaker
+        pending_key = (_speaker_paths(base_dir, speech["speaker"])[0], _content_fingerprint(speech["content"]))
+        task = self._pending_summaries.get(pending_key)
+        if task is None:
+            task = asyncio.ensure_future(self._summarize_speech(speech, base_dir, semaphore))
+            self._pending_summaries[pending_key] = task
+            task.add_done_callback(lambda _: self._pending_summaries.pop(pending_key, None))
+        return await asyncio.shield(task)
+
+    async def _summarize_speech(self, speech: dict, base_dir: str, semaphore: Optional[asyncio.Semaphore]) -> str:
+        speaker_slug, jsonl_path, urls_path = _speaker_paths(base_dir, speech["speaker"])
+
+        # Reuse the summary of a near-identical speech already stored for this speaker
+        with _SPEAKER_LOCKS[speaker_slug]:
+            speech_summary = _speaker_index(jsonl_path, urls_path)["summaries"].get(_content_fingerprint(speech["content"]))
+        if speech_summary is not None:
+            return speech_summary
+
+        cache_dir = Path(base_dir) / ".summary_cache"
+        # Keyed by speaker as well as content, since the prompt names the speaker
+        key = hashlib.blake2b(f"{speech['speaker']}\n{speech['content']}".encode(), digest_size=16).hexdigest()
+        cache_path = cache_dir / f"{key}.txt"
 
-        data["speeches"].append(cleaned_speech)
+        if cache_path.exists():
+            return cache_path.read_text(encoding="utf-8")
 
-        # Save to JSON
-        with open(json_path, "w") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        speech_summary = await self._summarize_content(speech["speaker"], speech["content"], semaphore)
 
-        print(f"✔️ Appended new speech to {json_path}")
+        # Only cache successful responses; write atomically so parallel runs never see partial files
+        if speech_summary:
+            _ensure_dir(cache_dir)
+            tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(speech_summary, encoding="utf-8")
+            os.replace(tmp_path, cache_path)
+
+        return speech_summary
+
+    async def _summarize_content(self, speaker: str, content: str, semaphore: Optional[asyncio.Semaphore] = None) -> Optional[str]:
+        """
+        Summarize speech content with Grok. Long speeches are map-reduced: overlapping
+        windows are summarized in parallel, then rolled up into one summary.
+        """
+        xclient = get_xai_client()
+        prompt = f"Please summarize the following speech/testimony given by Federal Reserve Board {speaker}"
+
+        async def ask(system_prompt: str, text: str) -> Optional[str]:
+            # every request, including each window, counts against the shared cap
+            async with semaphore or nullcontext():
+                return await xclient.get_response_async(model="grok-3-mini", messages=_summary_messages(system_prompt, text))
+
+        if len(content) <= _SUMMARY_CHUNK_THRESHOLD:
+            return await ask(prompt, content)
+
+        step = _SUMMARY_CHUNK_SIZE - _SUMMARY_CHUNK_OVERLAP
+        windows = [content[i:i + _SUMMARY_CHUNK_SIZE] for i in range(0, len(content) - _SUMMARY_CHUNK_OVERLAP, step)]
+        partials = await asyncio.gather(*(
+            ask(f"{prompt} (part {n} of {len(windows)})", window)
+            for n, window in enumerate(windows, start=1)
+        ))
+        if not all(partials):
+            return None
+
+        return await ask(
+            f"Combine these partial summaries of a speech/testimony given by Federal Reserve Board {speaker} "
+            "into a single concise summary of no more than 500 words",
+            "\n\n".join(partials),
+        )